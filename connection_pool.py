@@ -0,0 +1,290 @@
+import time
+import asyncio
+import logging
+import threading
+import urllib.parse
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger("connection_pool")
+
+class ConnectionPool:
+    """Process-wide keep-alive connections for yt-dlp, shared across YoutubeDL instances"""
+
+    def __init__(self, idle_timeout: int = 90, max_per_host: int = 10, max_hosts: int = 20):
+        self.idle_timeout = idle_timeout
+        self.max_per_host = max_per_host
+        self.max_hosts = max_hosts
+        self.adapters = {}
+        # (egress, host) -> counters; egress is "direct" or the proxy's host:port
+        self.hosts: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.lock = threading.Lock()
+
+    def get_adapter(self, key: tuple, factory):
+        """Return the shared adapter for a TLS/source-address config, creating it once"""
+        with self.lock:
+            adapter = self.adapters.get(key)
+            if adapter is None:
+                adapter = self.adapters[key] = factory()
+            return adapter
+
+    def _host_stats(self, egress: str, host: str) -> Dict[str, float]:
+        stats = self.hosts.get((egress, host))
+        if stats is None:
+            stats = self.hosts[(egress, host)] = {
+                'connects': 0, 'connect_time': 0.0,
+                'requests': 0, 'request_time': 0.0,
+                'errors': 0, 'last_used': time.monotonic(),
+            }
+        return stats
+
+    def record_connect(self, egress: str, host: str, elapsed: float) -> None:
+        """A new connection was opened (DNS + TCP + proxy CONNECT + TLS)"""
+        with self.lock:
+            stats = self._host_stats(egress, host)
+            stats['connects'] += 1
+            stats['connect_time'] += elapsed
+
+    def record_request(self, egress: str, host: str, elapsed: float, error: bool = False) -> None:
+        """A request finished (time until response headers, including any handshake)"""
+        with self.lock:
+            stats = self._host_stats(egress, host)
+            stats['last_used'] = time.monotonic()
+            if error:
+                stats['errors'] += 1
+                return
+            stats['requests'] += 1
+            stats['request_time'] += elapsed
+
+    def reap_idle(self) -> int:
+        """Close connections to hosts idle longer than idle_timeout; drop idle proxy egresses"""
+        now = time.monotonic()
+        with self.lock:
+            idle = {key for key, stats in self.hosts.items() if now - stats['last_used'] > self.idle_timeout}
+            active_egresses = {egress for (egress, _), stats in self.hosts.items()
+                               if now - stats['last_used'] <= self.idle_timeout}
+            adapters = list(self.adapters.values())
+
+        closed = 0
+        for adapter in adapters:
+            closed += _drain_idle_pools(adapter.poolmanager, idle)
+            with adapter.manager_lock:
+                for proxy, manager in list(adapter.proxy_manager.items()):
+                    if _egress_label(proxy) not in active_egresses:
+                        # Nothing went through this proxy recently; forget it entirely
+                        adapter.proxy_manager.pop(proxy, None)
+                        manager.clear()
+                    else:
+                        closed += _drain_idle_pools(manager, idle)
+
+        # Forget the stats of idle proxies too, or rotating free proxies grow this forever
+        with self.lock:
+            now = time.monotonic()
+            active_egresses = {egress for (egress, _), stats in self.hosts.items()
+                               if now - stats['last_used'] <= self.idle_timeout}
+            for egress, host in list(self.hosts):
+                if egress != 'direct' and egress not in active_egresses:
+                    del self.hosts[(egress, host)]
+        return closed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            hosts = []
+            for (egress, host), stats in sorted(self.hosts.items()):
+                requests = stats['requests']
+                connects = stats['connects']
+                hosts.append({
+                    "egress": egress,
+                    "host": host,
+                    "requests": requests,
+                    "new_connections": connects,
+                    "reused_connections": max(0, requests - connects),
+                    "errors": stats['errors'],
+                    "avg_handshake_ms": round(stats['connect_time'] / connects * 1000, 1) if connects else None,
+                    "avg_request_ms": round(stats['request_time'] / requests * 1000, 1) if requests else None,
+                })
+            total_requests = sum(h['requests'] for h in hosts)
+            total_connects = sum(h['new_connections'] for h in hosts)
+            handshake_time = sum(s['connect_time'] for s in self.hosts.values())
+            return {
+                "enabled": PooledRequestsRH is not None,
+                "idle_timeout": self.idle_timeout,
+                "max_per_host": self.max_per_host,
+                "total_requests": total_requests,
+                "handshakes_saved": max(0, total_requests - total_connects),
+                "handshake_time_spent_s": round(handshake_time, 2),
+                "hosts": hosts,
+            }
+
+    async def background_idle_reaper(self):
+        """Background task to close idle keep-alive connections"""
+        while True:
+            try:
+                await asyncio.sleep(self.idle_timeout / 3)
+                closed = await asyncio.get_event_loop().run_in_executor(None, self.reap_idle)
+                if closed:
+                    logger.info(f"🔌 Closed {closed} idle connections")
+            except Exception as e:
+                logger.error(f"Idle connection reaper error: {e}")
+                await asyncio.sleep(60)
+
+def _egress_label(proxy: Optional[str]) -> str:
+    if not proxy:
+        return 'direct'
+    parsed = urllib.parse.urlparse(proxy if '://' in proxy else f'http://{proxy}')
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else (parsed.hostname or proxy)
+
+def _pool_host(url: str, proxy: Optional[str]) -> str:
+    """The host urllib3 keys the connection pool by for a request to `url` via `proxy`.
+
+    Plain http:// through an HTTP proxy is forwarded, not tunnelled, so urllib3
+    pools those connections under the proxy's host rather than the target's.
+    """
+    parsed = urllib.parse.urlparse(url)
+    if proxy and parsed.scheme == 'http' and not proxy.lower().startswith('socks'):
+        return urllib.parse.urlparse(proxy if '://' in proxy else f'http://{proxy}').hostname or ''
+    return parsed.hostname or ''
+
+def _drain_idle_pools(manager, idle: set) -> int:
+    """Close the idle keep-alive connections of a urllib3 PoolManager's pools in `idle`"""
+    closed = 0
+    for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        if pool is None or (getattr(pool, 'egress', None), pool.host) not in idle:
+            continue
+        queue = pool.pool
+        if queue is None:
+            continue
+        # Take every slot first: the queue is LIFO, so putting a placeholder back
+        # straight away would just hand it to the next get()
+        taken = []
+        while True:
+            try:
+                taken.append(queue.get(block=False))
+            except Exception:
+                break
+        for conn in taken:
+            if conn is not None:
+                conn.close()
+                closed += 1
+        for _ in taken:
+            try:
+                # Keep the slot so the pool can open a fresh connection later
+                queue.put(None, block=False)
+            except Exception:
+                pass
+    return closed
+
+# Global connection pool instance
+connection_pool = ConnectionPool()
+
+try:
+    import urllib3
+    import requests
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from yt_dlp.networking.common import register_rh, register_preference
+    from yt_dlp.networking._requests import RequestsRH, RequestsHTTPAdapter, RequestsSession
+except ImportError as e:
+    logger.warning(f"⚠️ Shared connection pool disabled: {e}")
+    PooledRequestsRH = None
+else:
+    class _TimedConnectMixin:
+        pool_egress = 'direct'
+        pool_target = None
+
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            connection_pool.record_connect(self.pool_egress, self.pool_target or self.host, time.perf_counter() - start)
+
+    class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+        pass
+
+    class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+        pass
+
+    class _TimedPoolMixin:
+        egress = 'direct'
+
+        def _new_conn(self):
+            conn = super()._new_conn()
+            conn.pool_egress = self.egress
+            conn.pool_target = self.host
+            return conn
+
+    class TimedHTTPConnectionPool(_TimedPoolMixin, HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(_TimedPoolMixin, HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    def _use_timed_pools(manager, egress: str) -> None:
+        manager.pool_classes_by_scheme = {
+            'http': type('TimedHTTPConnectionPool', (TimedHTTPConnectionPool,), {'egress': egress}),
+            'https': type('TimedHTTPSConnectionPool', (TimedHTTPSConnectionPool,), {'egress': egress}),
+        }
+
+    class PooledHTTPAdapter(RequestsHTTPAdapter):
+        """yt-dlp's adapter with timed connections and one urllib3 manager per egress"""
+
+        def __init__(self, *args, **kwargs):
+            self.manager_lock = threading.Lock()
+            super().__init__(*args, **kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            _use_timed_pools(self.poolmanager, 'direct')
+
+        def proxy_manager_for(self, proxy, **proxy_kwargs):
+            with self.manager_lock:
+                is_new = proxy not in self.proxy_manager
+                manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+                if is_new and not proxy.lower().startswith('socks'):
+                    _use_timed_pools(manager, _egress_label(proxy))
+                return manager
+
+        def send(self, request, *args, **kwargs):
+            proxy = requests.utils.select_proxy(request.url, kwargs.get('proxies'))
+            egress = _egress_label(proxy)
+            # Same key the pool (and so record_connect and the reaper) uses
+            host = _pool_host(request.url, proxy)
+            start = time.perf_counter()
+            try:
+                response = super().send(request, *args, **kwargs)
+            except Exception:
+                connection_pool.record_request(egress, host, time.perf_counter() - start, error=True)
+                raise
+            connection_pool.record_request(egress, host, time.perf_counter() - start)
+            return response
+
+    @register_rh
+    class PooledRequestsRH(RequestsRH):
+        """RequestsRH whose sessions share process-wide keep-alive adapters"""
+        RH_NAME = 'pooled_requests'
+
+        def _create_instance(self, cookiejar, legacy_ssl_support=None):
+            key = (self.verify, legacy_ssl_support, repr(sorted(self._client_cert.items())), self.source_address)
+            http_adapter = connection_pool.get_adapter(key, lambda: PooledHTTPAdapter(
+                ssl_context=self._make_sslcontext(legacy_ssl_support=legacy_ssl_support),
+                source_address=self.source_address,
+                max_retries=urllib3.util.retry.Retry(False),
+                pool_connections=connection_pool.max_hosts,
+                pool_maxsize=connection_pool.max_per_host,
+            ))
+            session = RequestsSession()
+            session.adapters.clear()
+            session.headers = requests.models.CaseInsensitiveDict({'Connection': 'keep-alive'})
+            session.mount('https://', http_adapter)
+            session.mount('http://', http_adapter)
+            session.cookies = cookiejar
+            session.trust_env = False  # proxies come from yt-dlp
+            return session
+
+        def _close_instance(self, instance):
+            # The adapters outlive this YoutubeDL; only drop the session
+            instance.adapters.clear()
+            instance.close()
+
+    @register_preference(PooledRequestsRH)
+    def pooled_requests_preference(rh, request):
+        return 200
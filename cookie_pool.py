@@ -0,0 +1,206 @@
+import os
+import re
+import glob
+import time
+import random
+import logging
+import threading
+import urllib.parse
+from collections import deque
+from typing import Optional, List, Dict, Any
+
+logger = logging.getLogger("cookie_pool")
+
+# YouTube's own bot-check wording. Kept narrow on purpose: generic words like
+# "verify" or "sign in" also show up in SSL failures and age gates.
+BOT_DETECTION_PATTERN = re.compile(r"confirm you.re not a (?:ro)?bot|captcha|unusual traffic")
+
+def is_bot_detection(error: Exception) -> bool:
+    """Check whether an extraction error is a YouTube bot check"""
+    return bool(BOT_DETECTION_PATTERN.search(str(error).lower()))
+
+# Short-link hosts that are served with another domain's cookies
+HOST_ALIASES = {'youtu.be': 'youtube.com'}
+
+class CookieSession:
+    def __init__(self, name: str, cookies: list, max_requests_per_minute: int = 20):
+        self.name = name
+        self.cookies = cookies
+        self.domains = {c.domain.lstrip('.').lower() for c in cookies if c.domain}
+        self.max_requests_per_minute = max_requests_per_minute
+        self.recent_uses = deque()
+        self.outcomes = deque(maxlen=20)  # (ok, egress); ok is False for a bot detection
+        self.attempts = 0
+        self.successes = 0
+        self.bot_detections = 0
+        self.errors = 0
+        self.consecutive_bot_egresses = []
+        self.quarantined_until = 0.0
+        self.quarantine_count = 0
+
+    def matches(self, url: str) -> bool:
+        """Whether this session has cookies for the URL's host"""
+        host = (urllib.parse.urlparse(url).hostname or '').lower()
+        host = HOST_ALIASES.get(host, host)
+        return any(host == d or host.endswith('.' + d) for d in self.domains)
+
+    def is_quarantined(self, now: float) -> bool:
+        return now < self.quarantined_until
+
+    def is_rate_limited(self, now: float) -> bool:
+        while self.recent_uses and now - self.recent_uses[0] > 60:
+            self.recent_uses.popleft()
+        return len(self.recent_uses) >= self.max_requests_per_minute
+
+    def bot_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok, _ in self.outcomes if not ok) / len(self.outcomes)
+
+    def apply_to(self, ydl) -> None:
+        """Copy the in-memory cookies into a YoutubeDL instance's cookie jar"""
+        for cookie in self.cookies:
+            ydl.cookiejar.set_cookie(cookie)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "bot_detections": self.bot_detections,
+            "errors": self.errors,
+            "success_rate": round(self.successes / self.attempts, 3) if self.attempts else None,
+            "recent_bot_rate": round(self.bot_rate(), 3),
+            "quarantined": self.is_quarantined(now),
+            "quarantine_remaining": max(0, round(self.quarantined_until - now)),
+            "quarantine_count": self.quarantine_count,
+        }
+
+class CookiePool:
+    def __init__(self, max_requests_per_minute: int = 20, quarantine_seconds: int = 1800,
+                 bot_rate_threshold: float = 0.5, min_samples: int = 5, max_consecutive_bot_detections: int = 3):
+        self.sessions: List[CookieSession] = []
+        self.max_requests_per_minute = max_requests_per_minute
+        self.quarantine_seconds = quarantine_seconds
+        self.bot_rate_threshold = bot_rate_threshold
+        self.min_samples = min_samples
+        self.max_consecutive_bot_detections = max_consecutive_bot_detections
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, paths: Optional[List[str]] = None) -> int:
+        """Parse cookie files once into memory; each file becomes one session"""
+        if paths is None:
+            paths = get_cookie_file_paths()
+
+        from yt_dlp.cookies import YoutubeDLCookieJar
+
+        sessions = []
+        for path in paths:
+            try:
+                jar = YoutubeDLCookieJar(path)
+                jar.load()
+                cookies = list(jar)
+                if cookies:
+                    sessions.append(CookieSession(os.path.basename(path), cookies, self.max_requests_per_minute))
+                    logger.info(f"🍪 Loaded {len(cookies)} cookies from {path}")
+            except Exception as e:
+                logger.warning(f"❌ Could not load cookie file {path}: {str(e)[:100]}")
+
+        with self.lock:
+            self.sessions = sessions
+            self.loaded = True
+        return len(sessions)
+
+    def acquire(self, url: str) -> Optional[CookieSession]:
+        """Pick the healthiest available session for a URL, or None to go without cookies"""
+        if not self.loaded:
+            self.load()
+
+        with self.lock:
+            now = time.time()
+            candidates = [s for s in self.sessions
+                          if s.matches(url) and not s.is_quarantined(now) and not s.is_rate_limited(now)]
+            if not candidates:
+                return None
+
+            # Rotate across the healthiest sessions, least recently used first on ties
+            lowest_bot_rate = min(s.bot_rate() for s in candidates)
+            healthiest = [s for s in candidates if s.bot_rate() == lowest_bot_rate]
+            session = min(healthiest, key=lambda s: (len(s.recent_uses), random.random()))
+            session.recent_uses.append(now)
+            session.attempts += 1
+            return session
+
+    def report(self, session: Optional[CookieSession], proxy: Optional[str] = None,
+               success: bool = False, error: Optional[Exception] = None) -> None:
+        """Record the outcome of an extraction made with a session through `proxy` (None = direct)"""
+        if session is None:
+            return
+
+        egress = proxy or 'direct'
+        with self.lock:
+            if success:
+                session.successes += 1
+                session.consecutive_bot_egresses = []
+                session.outcomes.append((True, egress))
+            elif error is not None and is_bot_detection(error):
+                session.bot_detections += 1
+                session.consecutive_bot_egresses.append(egress)
+                session.outcomes.append((False, egress))
+                self._maybe_quarantine(session)
+            else:
+                # Unavailable videos, age gates, SSL and transport errors say nothing about the session
+                session.errors += 1
+
+    def _maybe_quarantine(self, session: CookieSession) -> None:
+        failed_egresses = [egress for ok, egress in session.outcomes if not ok]
+        burned = _blame(session.consecutive_bot_egresses) >= self.max_consecutive_bot_detections or (
+            len(session.outcomes) >= self.min_samples and session.bot_rate() >= self.bot_rate_threshold
+            and _blame(failed_egresses) >= self.max_consecutive_bot_detections
+        )
+        if not burned:
+            return
+
+        # Back off harder for sessions that keep getting burned
+        duration = self.quarantine_seconds * (2 ** min(session.quarantine_count, 4))
+        session.quarantined_until = time.time() + duration
+        session.quarantine_count += 1
+        session.consecutive_bot_egresses = []
+        session.outcomes.clear()
+        logger.warning(f"🚫 Cookie session {session.name} quarantined for {duration}s (bot rate too high)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            now = time.time()
+            attempts = sum(s.attempts for s in self.sessions)
+            successes = sum(s.successes for s in self.sessions)
+            return {
+                "total_sessions": len(self.sessions),
+                "available_sessions": sum(1 for s in self.sessions if not s.is_quarantined(now)),
+                "attempts_per_success": round(attempts / successes, 2) if successes else None,
+                "sessions": [s.stats(now) for s in self.sessions],
+            }
+
+def _blame(egresses: List[str]) -> int:
+    """How many bot detections point at the session rather than at a proxy's IP.
+
+    Every direct failure counts; a proxy counts once however often it failed,
+    since repeated bot checks through one proxy are mostly its IP reputation.
+    """
+    direct = sum(1 for egress in egresses if egress == 'direct')
+    return direct + len({egress for egress in egresses if egress != 'direct'})
+
+def get_cookie_file_paths() -> List[str]:
+    """Cookie files from COOKIE_FILES (comma separated), else cookies.txt and cookies/*.txt"""
+    env_paths = os.getenv('COOKIE_FILES')
+    if env_paths:
+        return [p.strip() for p in env_paths.split(',') if p.strip()]
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(base_dir, 'cookies.txt')]
+    paths += sorted(glob.glob(os.path.join(base_dir, 'cookies', '*.txt')))
+    return [p for p in paths if os.path.isfile(p)]
+
+# Global cookie pool instance
+cookie_pool = CookiePool()
@@ -1,6 +1,5 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import yt_dlp
 import urllib.parse
 import random
 import logging
@@ -8,6 +7,9 @@ import asyncio
 
 from proxy_utils import get_proxy_quickly, start_background_proxy_refresh
 from youtube_bypass import youtube_bypass
+from cookie_pool import cookie_pool
+from connection_pool import connection_pool
+import profiling
 
 # Logging
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
@@ -55,8 +57,6 @@ def get_ydl_opts(proxy: str = None) -> dict:
         'sleep_interval_subtitles': 1,
         # Try to avoid age gate
         'age_limit': 99,
-        # Use cookies if available (you can add cookie file later)
-        'cookiefile': None,
         # Additional YouTube bypasses
         'youtube_include_dash_manifest': False,
         'extract_args': {
@@ -73,6 +73,11 @@ def get_ydl_opts(proxy: str = None) -> dict:
 async def startup_event():
     # Start background proxy refresh - non-blocking
     asyncio.create_task(start_background_proxy_refresh())
+    # Close keep-alive connections that yt-dlp hasn't reused in a while
+    asyncio.create_task(connection_pool.background_idle_reaper())
+    # Parse cookie jars once so extractions don't re-read them
+    sessions = cookie_pool.load()
+    logging.info(f"🍪 Cookie pool ready with {sessions} session(s)")
     logging.info("🚀 API ready! Background proxy fetching started.")
 
 import os
@@ -80,6 +85,10 @@ import os
 # Environment detection
 IS_CLOUD = bool(os.getenv('RENDER') or os.getenv('VERCEL') or os.getenv('HEROKU') or os.getenv('RAILWAY') or os.getenv('FLY_APP_NAME'))
 
+# Opt-in profiling endpoints under /debug (set PROFILING_ENABLED=1)
+if profiling.PROFILING_ENABLED:
+    profiling.install(app)
+
 @app.get("/get-video-url-simple")
 async def get_video_url_simple(video_url: str):
     """Simple endpoint for testing - minimal processing"""
@@ -100,8 +109,8 @@ async def get_video_url_simple(video_url: str):
             }
         }
         
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
+        info = youtube_bypass.extract_with_cookies(video_url, opts)
+        if info:
             download_url = extract_video_url(info)
             if download_url:
                 logging.info("✅ Simple extraction success!")
@@ -190,8 +199,8 @@ async def get_video_url(video_url: str):
             }
         }
         
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
+        info = youtube_bypass.extract_with_cookies(video_url, opts)
+        if info:
             download_url = extract_video_url(info)
             if download_url:
                 logging.info("✅ Basic fallback success!")
@@ -240,6 +249,16 @@ def format_response(info: dict, download_url: str) -> dict:
         "thumbnail": info.get('thumbnail')
     }
 
+@app.get("/cookie-stats")
+async def cookie_stats():
+    """Health of each cookie session in the pool"""
+    return cookie_pool.get_stats()
+
+@app.get("/connection-stats")
+async def connection_stats():
+    """Keep-alive reuse and handshake timing per egress and host"""
+    return connection_pool.get_stats()
+
 @app.get("/")
 async def root():
     env_type = "Cloud Platform" if IS_CLOUD else "Local Development"
@@ -248,7 +267,9 @@ async def root():
         "environment": env_type,
         "endpoints": {
             "get_video": "/get-video-url?video_url=YOUR_URL",
-            "get_video_simple": "/get-video-url-simple?video_url=YOUR_URL (faster, basic extraction)"
+            "get_video_simple": "/get-video-url-simple?video_url=YOUR_URL (faster, basic extraction)",
+            "cookie_stats": "/cookie-stats",
+            "connection_stats": "/connection-stats"
         },
         "active_proxies": len(proxy_manager.working_proxies) if 'proxy_manager' in globals() else 0
     }
@@ -0,0 +1,296 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import tracemalloc
+from collections import Counter, deque
+from typing import Dict, Any, List
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger("profiling")
+
+# Opt-in: nothing below is installed unless this is set
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _walk_stack(frame) -> List:
+    """Frames from outermost to innermost"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+class SamplingProfiler:
+    """Wall-clock sampler over all threads, aggregated as collapsed (flamegraph) stacks"""
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive() and not self.stop_event.is_set()
+
+    def start(self, seconds: float, interval: float) -> bool:
+        if self.running:
+            return False
+        # A stopped run may still be between samples; let it exit before resetting
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        # Each run owns its event, so stopping one can never stop or extend another
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.stop_event, time.monotonic() + seconds, interval),
+                                       name="sampling-profiler", daemon=True)
+        self.thread.start()
+        logger.info(f"🔬 Sampling profiler started for {seconds}s")
+        return True
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def _run(self, stop_event: threading.Event, deadline: float, interval: float) -> None:
+        own_ident = threading.get_ident()
+        while not stop_event.is_set() and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = [names.get(ident, str(ident))] + [_frame_label(f) for f in _walk_stack(frame)]
+                self.stacks[';'.join(stack)] += 1
+            self.samples += 1
+            stop_event.wait(interval)
+        stop_event.set()
+        logger.info(f"🔬 Sampling profiler finished with {self.samples} samples")
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, readable by flamegraph.pl and speedscope"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+class LoopLagMonitor:
+    """Detects event-loop stalls and captures what the loop thread was running"""
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, history: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.last_tick = time.monotonic()
+        self.loop_thread_id = None
+        self.handler_codes = set()
+        self.pending_stall = None
+        self.pending_tick = None
+
+    def start(self, handler_codes: set) -> None:
+        """Call from inside the running event loop"""
+        self.loop_thread_id = threading.get_ident()
+        self.handler_codes = handler_codes
+        self.last_tick = time.monotonic()
+        asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            previous_tick, self.last_tick = self.last_tick, time.monotonic()
+            lag = self.last_tick - expected
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                # Only trust a captured stack that belongs to this stall
+                captured = self.pending_stall if self.pending_tick == previous_tick else None
+                stall = dict(captured or {"handler": "unknown", "stack": []})
+                stall.update({"lag_ms": round(lag * 1000), "time": time.time()})
+                self.stalls.append(stall)
+                logger.warning(f"🐢 Event loop blocked for {stall['lag_ms']}ms in {stall['handler']}")
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            tick = self.last_tick
+            if self.pending_tick == tick or time.monotonic() - tick < self.threshold:
+                continue
+            # Loop is stuck right now: grab its stack while the blocking call is still on it
+            frame = sys._current_frames().get(self.loop_thread_id)
+            frames = _walk_stack(frame)
+            handler = next((f.f_code.co_name for f in frames if f.f_code in self.handler_codes), "unknown")
+            self.pending_stall = {"handler": handler, "stack": [_frame_label(f) for f in frames[-15:]]}
+            self.pending_tick = tick
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "max_lag_ms": round(self.max_lag * 1000),
+            "stalls": list(self.stalls),
+        }
+
+class MemoryTracker:
+    """tracemalloc snapshots/diffs and per-request peak allocation tags"""
+
+    def __init__(self, history: int = 100):
+        self.baseline = None
+        self.requests = deque(maxlen=history)
+        self.in_flight = 0
+        self.started = 0
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"🧠 tracemalloc started ({frames} frames)")
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.baseline = None
+        logger.info("🧠 tracemalloc stopped")
+
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def snapshot(self, limit: int) -> List[Dict[str, Any]]:
+        """Take a new baseline and return its largest allocation sites"""
+        self.baseline = self.take_snapshot()
+        return [{
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        } for stat in self.baseline.statistics('lineno')[:limit]]
+
+    def diff(self, limit: int) -> List[Dict[str, Any]]:
+        """Allocation growth since the baseline snapshot"""
+        current = self.take_snapshot()
+        return [{
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+        } for stat in current.compare_to(self.baseline, 'lineno')[:limit]]
+
+    async def track_request(self, request: Request, call_next):
+        """Middleware: tag each response with the peak traced memory while it ran.
+
+        The peak is process-wide and only reset when no other request is in flight,
+        so for overlapping requests it covers their allocations too (an upper bound).
+        """
+        if not tracemalloc.is_tracing():
+            return await call_next(request)
+
+        start, _ = tracemalloc.get_traced_memory()
+        overlapped = self.in_flight > 0
+        if not overlapped:
+            tracemalloc.reset_peak()
+        self.in_flight += 1
+        self.started += 1
+        started = self.started
+        try:
+            response = await call_next(request)
+        finally:
+            self.in_flight -= 1
+        if not tracemalloc.is_tracing():
+            return response
+        _, peak = tracemalloc.get_traced_memory()
+
+        peak_kb = max(0, peak - start) // 1024
+        # Another request ran alongside this one if it was still running or started meanwhile
+        overlapped = overlapped or self.in_flight > 0 or self.started != started
+        response.headers['X-Peak-Alloc-KB'] = str(peak_kb)
+        self.requests.append({"path": request.url.path, "peak_alloc_kb": peak_kb,
+                              "overlapped": overlapped, "time": time.time()})
+        return response
+
+# Global profiling instances
+sampling_profiler = SamplingProfiler()
+loop_lag_monitor = LoopLagMonitor()
+memory_tracker = MemoryTracker()
+
+router = APIRouter(prefix="/debug")
+
+@router.post("/profile/start")
+async def start_profile(seconds: float = 30, interval_ms: float = 10):
+    """Run the sampling profiler for N seconds"""
+    if not 0 < seconds <= 600 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 600], interval_ms in [1, 1000]")
+    if not sampling_profiler.start(seconds, interval_ms / 1000):
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    return {"status": "started", "seconds": seconds, "interval_ms": interval_ms}
+
+@router.post("/profile/stop")
+async def stop_profile():
+    sampling_profiler.stop()
+    return {"status": "stopped", "samples": sampling_profiler.samples}
+
+@router.get("/profile/flamegraph", response_class=PlainTextResponse)
+async def profile_flamegraph():
+    """Collapsed stacks from the last profiling run"""
+    return sampling_profiler.collapsed()
+
+@router.post("/memory/start")
+async def start_memory_tracking(frames: int = 10):
+    if not 1 <= frames <= 65535:
+        raise HTTPException(status_code=400, detail="frames must be in [1, 65535]")
+    memory_tracker.start(frames)
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+@router.post("/memory/stop")
+async def stop_memory_tracking():
+    memory_tracker.stop()
+    return {"tracing": False}
+
+@router.post("/memory/snapshot")
+async def memory_snapshot(limit: int = 25):
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be >= 1")
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running; POST /debug/memory/start first")
+    # Snapshotting walks the whole heap; keep it off the event loop
+    loop = asyncio.get_event_loop()
+    return {"top_allocations": await loop.run_in_executor(None, memory_tracker.snapshot, limit)}
+
+@router.get("/memory/diff")
+async def memory_diff(limit: int = 25):
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be >= 1")
+    if not tracemalloc.is_tracing() or memory_tracker.baseline is None:
+        raise HTTPException(status_code=409, detail="No baseline; POST /debug/memory/snapshot first")
+    loop = asyncio.get_event_loop()
+    return {"growth": await loop.run_in_executor(None, memory_tracker.diff, limit)}
+
+@router.get("/memory/requests")
+async def memory_requests():
+    """Recent requests tagged with their peak allocation"""
+    return {"requests": list(memory_tracker.requests)}
+
+@router.get("/loop-lag")
+async def loop_lag():
+    return loop_lag_monitor.get_stats()
+
+def install(app) -> None:
+    """Add the /debug endpoints, request memory tagging and the loop lag monitor to the app"""
+    app.include_router(router)
+    app.middleware("http")(memory_tracker.track_request)
+
+    async def start_loop_lag_monitor():
+        handler_codes = {route.endpoint.__code__ for route in app.routes
+                         if hasattr(getattr(route, 'endpoint', None), '__code__')}
+        loop_lag_monitor.start(handler_codes)
+        logger.info("🔬 Profiling enabled at /debug")
+
+    app.add_event_handler("startup", start_loop_lag_monitor)
@@ -0,0 +1,63 @@
+import queue
+
+from connection_pool import ConnectionPool, _drain_idle_pools, _pool_host
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakePool:
+    egress = 'direct'
+
+    def __init__(self, host, conns, maxsize=10):
+        self.host = host
+        self.pool = queue.LifoQueue(maxsize)
+        # urllib3 pre-fills the queue with None placeholders, kept-alive connections go on top
+        for _ in range(maxsize - len(conns)):
+            self.pool.put(None)
+        for conn in conns:
+            self.pool.put(conn)
+
+class FakeManager:
+    def __init__(self, pools):
+        self.pools = {pool.host: pool for pool in pools}
+
+def test_drain_closes_every_idle_connection():
+    conns = [FakeConnection() for _ in range(4)]
+    pool = FakePool('youtubei.googleapis.com', conns)
+    manager = FakeManager([pool])
+
+    assert _drain_idle_pools(manager, {('direct', 'youtubei.googleapis.com')}) == 4
+    assert all(conn.closed for conn in conns)
+    # Slots are kept so the pool can still open new connections
+    assert pool.pool.qsize() == 10
+    assert _drain_idle_pools(manager, {('direct', 'youtubei.googleapis.com')}) == 0
+
+def test_drain_skips_active_hosts():
+    conns = [FakeConnection() for _ in range(2)]
+    manager = FakeManager([FakePool('www.youtube.com', conns)])
+
+    assert _drain_idle_pools(manager, {('direct', 'youtubei.googleapis.com')}) == 0
+    assert not any(conn.closed for conn in conns)
+
+def test_reap_forgets_stats_of_idle_proxies():
+    pool = ConnectionPool(idle_timeout=60)
+    pool.record_request('1.2.3.4:8080', 'www.youtube.com', 0.1)
+    pool.record_request('5.6.7.8:3128', 'www.youtube.com', 0.1)
+    pool.record_request('direct', 'www.youtube.com', 0.1)
+    for key in [('1.2.3.4:8080', 'www.youtube.com'), ('direct', 'www.youtube.com')]:
+        pool.hosts[key]['last_used'] -= 120
+
+    pool.reap_idle()
+
+    assert set(pool.hosts) == {('5.6.7.8:3128', 'www.youtube.com'), ('direct', 'www.youtube.com')}
+
+def test_pool_host_matches_urllib3_pool_keys():
+    # Tunnelled and direct requests are pooled by target host
+    assert _pool_host('https://www.youtube.com/watch', 'http://1.2.3.4:8080') == 'www.youtube.com'
+    assert _pool_host('http://example.com/a', None) == 'example.com'
+    # Forwarded plain http is pooled by the proxy's host
+    assert _pool_host('http://example.com/a', 'http://1.2.3.4:8080') == '1.2.3.4'
@@ -0,0 +1,47 @@
+import http.cookiejar
+
+from cookie_pool import CookiePool, CookieSession, is_bot_detection
+
+def test_bot_check_messages_are_detected():
+    assert is_bot_detection(Exception("ERROR: [youtube] abc: Sign in to confirm you’re not a bot. Use --cookies"))
+    assert is_bot_detection(Exception("Sign in to confirm you're not a bot"))
+    assert is_bot_detection(Exception("Please solve the CAPTCHA"))
+
+def test_unrelated_errors_are_not_bot_detection():
+    assert not is_bot_detection(Exception("[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed"))
+    assert not is_bot_detection(Exception("[youtube] xBoTa12_3Qz: Video unavailable"))
+    assert not is_bot_detection(Exception("Sign in to confirm your age. This video may be inappropriate"))
+
+BOT_CHECK = Exception("Sign in to confirm you're not a bot")
+
+def make_pool():
+    cookie = http.cookiejar.Cookie(
+        0, 'SID', 'x', None, False, '.youtube.com', True, True, '/', True, True, None, False, None, None, {})
+    pool = CookiePool(max_requests_per_minute=100)
+    pool.sessions = [CookieSession('cookies.txt', [cookie], 100)]
+    pool.loaded = True
+    return pool
+
+def test_one_bad_proxy_does_not_quarantine_session():
+    pool = make_pool()
+    for _ in range(10):
+        session = pool.acquire('https://www.youtube.com/watch?v=x')
+        assert session is not None
+        pool.report(session, 'http://1.2.3.4:8080', error=BOT_CHECK)
+
+def test_bot_checks_on_direct_egress_quarantine_session():
+    pool = make_pool()
+    for _ in range(3):
+        pool.report(pool.acquire('https://www.youtube.com/watch?v=x'), None, error=BOT_CHECK)
+    assert pool.acquire('https://www.youtube.com/watch?v=x') is None
+
+def test_bot_checks_across_distinct_proxies_quarantine_session():
+    pool = make_pool()
+    for proxy in ['http://1.1.1.1:80', 'http://2.2.2.2:80', 'http://3.3.3.3:80']:
+        pool.report(pool.acquire('https://www.youtube.com/watch?v=x'), proxy, error=BOT_CHECK)
+    assert pool.acquire('https://www.youtube.com/watch?v=x') is None
+
+def test_short_links_use_youtube_cookies():
+    pool = make_pool()
+    assert pool.acquire('https://youtu.be/dQw4w9WgXcQ') is not None
+    assert pool.acquire('https://vimeo.com/1') is None
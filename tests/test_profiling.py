@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import tracemalloc
+import types
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException
+
+from profiling import MemoryTracker, SamplingProfiler, memory_diff, memory_snapshot, start_memory_tracking
+
+def fake_request(path):
+    return types.SimpleNamespace(url=types.SimpleNamespace(path=path))
+
+def fake_response():
+    return types.SimpleNamespace(headers={})
+
+def test_overlapping_request_keeps_its_peak():
+    tracker = MemoryTracker()
+    first_peaked = asyncio.Event()
+    second_started = asyncio.Event()
+
+    async def first_handler(request):
+        data = bytearray(4 * 1024 * 1024)
+        del data
+        first_peaked.set()
+        await second_started.wait()
+        return fake_response()
+
+    async def second_handler(request):
+        second_started.set()
+        return fake_response()
+
+    async def run():
+        first = asyncio.ensure_future(tracker.track_request(fake_request('/first'), first_handler))
+        await first_peaked.wait()
+        await tracker.track_request(fake_request('/second'), second_handler)
+        return await first
+
+    tracemalloc.start()
+    try:
+        response = asyncio.run(run())
+    finally:
+        tracemalloc.stop()
+
+    assert int(response.headers['X-Peak-Alloc-KB']) >= 4096
+    assert all(entry['overlapped'] for entry in tracker.requests)
+
+def test_restarting_profiler_leaves_one_sampling_thread():
+    profiler = SamplingProfiler()
+    assert profiler.start(5, 0.001)
+    first_thread, first_event = profiler.thread, profiler.stop_event
+    while profiler.samples < 2:
+        time.sleep(0.001)
+    profiler.stop()
+
+    # Long interval: the new run takes one sample and then waits
+    assert profiler.start(5, 10)
+    try:
+        assert not first_thread.is_alive()
+        assert first_event.is_set()
+        assert not profiler.stop_event.is_set()
+        assert sum(1 for t in threading.enumerate() if t.name == 'sampling-profiler') == 1
+        assert profiler.running
+        assert profiler.samples <= 1
+    finally:
+        profiler.stop()
+        profiler.thread.join()
+    assert not profiler.running
+
+def test_memory_start_rejects_invalid_frames():
+    for frames in (0, 65536):
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(start_memory_tracking(frames))
+        assert excinfo.value.status_code == 400
+    assert not tracemalloc.is_tracing()
+
+def test_memory_snapshot_and_diff_run_off_the_event_loop():
+    async def run():
+        loop_thread = threading.get_ident()
+        threads = []
+        original_take_snapshot = tracemalloc.take_snapshot
+
+        def recording_take_snapshot():
+            threads.append(threading.get_ident())
+            return original_take_snapshot()
+
+        tracemalloc.take_snapshot = recording_take_snapshot
+        try:
+            await memory_snapshot(5)
+            await memory_diff(5)
+        finally:
+            tracemalloc.take_snapshot = original_take_snapshot
+        return loop_thread, threads
+
+    tracemalloc.start()
+    try:
+        loop_thread, threads = asyncio.run(run())
+    finally:
+        tracemalloc.stop()
+
+    assert len(threads) == 2
+    assert loop_thread not in threads
+
+def test_memory_endpoints_reject_invalid_limit():
+    for endpoint in (memory_snapshot, memory_diff):
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(endpoint(-5))
+        assert excinfo.value.status_code == 400
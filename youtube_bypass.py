@@ -4,6 +4,8 @@ import random
 import asyncio
 from typing import Optional, Dict, Any
 
+from cookie_pool import cookie_pool, is_bot_detection
+
 logger = logging.getLogger("youtube_bypass")
 
 class YouTubeBypass:
@@ -125,7 +127,7 @@ class YouTubeBypass:
                         
                 except yt_dlp.utils.DownloadError as e:
                     error_msg = str(e).lower()
-                    if any(keyword in error_msg for keyword in ['sign in', 'bot', 'captcha', 'verify']):
+                    if is_bot_detection(e):
                         logger.warning(f"🤖 Bot detection: {str(e)[:100]}")
                         continue
                     elif 'unavailable' in error_msg or 'private' in error_msg:
@@ -140,11 +142,30 @@ class YouTubeBypass:
         
         return None
     
+    def extract_with_cookies(self, url: str, opts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Synchronous extract_info using a cookie session from the pool when one fits the URL"""
+        session = cookie_pool.acquire(url)
+        if session:
+            # Android clients don't support cookies; give yt-dlp clients that do
+            youtube_args = opts.setdefault('extractor_args', {}).setdefault('youtube', {})
+            youtube_args['player_client'] = ['tv', 'web'] + youtube_args.get('player_client', [])
+
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                if session:
+                    session.apply_to(ydl)
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            cookie_pool.report(session, opts.get('proxy'), error=e)
+            raise
+
+        cookie_pool.report(session, opts.get('proxy'), success=bool(info))
+        return info
+
     def _extract_sync(self, url: str, opts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Synchronous extraction (to be run in executor)"""
         try:
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                return ydl.extract_info(url, download=False)
+            return self.extract_with_cookies(url, opts)
         except Exception:
             return None
 